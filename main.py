@@ -2,64 +2,91 @@
 
 import argparse
 import os
-from sys import stderr
+from sys import exit, stderr
 
 from sunbox.sbox import SBox
 from sunbox.format import *
+from sunbox.report import automatic_analysis, print_summary
+from sunbox.outofcore import OutOfCore, CheckpointMismatch, StorageTooLarge
+from sunbox.options import add_arguments
 
 def debug(*args, **kwargs):
     print(*args, **kwargs, file = stderr, flush = True)
 
+def positive(value):
+    value = int(value)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"{value} is not a positive integer")
+    return value
+
 parser = argparse.ArgumentParser(
     description = "An open-source SBox analysis utility",
 )
 
-parser.add_argument(
-    '-in', '-i',
-    dest = 'input_files',
-    required = True,
-    nargs = '*',
-    help = 'Input file(s) containing the SBoxes to analyze'
-)
-
-parser.add_argument(
-    '-lat',
-    action = 'store_true',
-    help = 'Compute the Linear Approximation Table of the SBoxes'
-)
-
-parser.add_argument(
-    '-ddt',
-    action = 'store_true',
-    help = 'Compute the Difference Distribution Table of the SBoxes'
-)
+add_arguments(parser)
 
 parser.add_argument(
-    '-act',
+    '-outofcore',
     action = 'store_true',
-    help = 'Compute the Autocorrelation Table of the SBoxes'
+    help = 'Compute the tables by blocks in a pool of processes and only '
+           'print their aggregates, for SBoxes too wide to be held in memory. '
+           'If an output directory is given, tables are stored there as '
+           'memory-mapped files, and interrupted runs are resumed'
 )
 
 parser.add_argument(
-    '-auto',
+    '-nostore',
     action = 'store_true',
-    help = 'Performs an automatic analysis of the SBoxes and outputs relevant information'
+    help = 'With -outofcore, only keep checkpoints in the output directory'
 )
 
 parser.add_argument(
-    '-format',
-    choices = ['ansi', 'csv', 'png'],
-    default = 'ansi',
-    help = 'Output format for the tables',
-)
-
-parser.add_argument(
-    '-output', '-out',
-    default = 'stdout',
-    help = 'Output directory path or "stdout" to print to standard output'
+    '-workers', '-j',
+    type = positive,
+    default = None,
+    help = 'Number of worker processes for -outofcore '
+           '(defaults to the number of CPUs)'
 )
 
 args = parser.parse_args()
+exit_status = 0
+
+def out_of_core(S, table, sbox_file):
+    global exit_status
+
+    if args.output == 'stdout':
+        directory = None
+    else:
+        directory = os.path.splitext(os.path.basename(sbox_file))[0]
+        directory = os.path.join(args.output, directory)
+
+    def progress(done, total):
+        debug(f"\r{done}/{total} blocks", end = '')
+
+    computation = OutOfCore(
+        S, table, directory,
+        store = not args.nostore,
+        workers = args.workers,
+    )
+    try:
+        summary = computation.run(progress)
+    except CheckpointMismatch as error:
+        debug(f"Error: {error}.")
+        if computation.checkpoint_path is not None:
+            debug(f"Delete {computation.checkpoint_path} to start over, "
+                  f"or use another output directory.")
+        debug()
+        exit_status = 1
+        return
+    except StorageTooLarge as error:
+        debug(f"Error: {error}.")
+        debug("Use -nostore to only keep checkpoints in the output directory.")
+        debug()
+        exit_status = 1
+        return
+    debug()
+    print_summary(summary)
+    debug()
 
 
 for sbox_file in args.input_files:
@@ -68,74 +95,13 @@ for sbox_file in args.input_files:
 
     if args.auto:
         debug("Automatic analysis.")
+        automatic_analysis(S)
 
-        # Linear cryptanalysis
-        if not S.is_bijective():
-            print("Warning: The SBox is not bijective.")
-        if S.is_linear():
-            print("SBox is linear! It is equivalent to the following matrix M:")
-            for line in S.matrix_equivalent():
-                print(*line)
-            print("That is, SBox(x) = M·x for all x. "
-                  "(x represented as a column binary vector)")
-        elif S.is_xor():
-            print("SBox is a simple XOR! It is equivalent to the following equation:")
-            print(f"    S(x) = x ⊕ {S[0]}")
-        elif S.is_affine():
-            print("SBox is affine! It is equivalent to the following matrices A, B:")
-            A, B = S.affine_equivalent()
-            for y in range(S.n):
-                print(*A[y], ' \t ', B[y][0])
-            print("That is, SBox(x) = A·x ⊕ B for all x. "
-                  "(x represented as a column binary vector)")
-        else:
-            print("SBox is not linear.")
-            p, approximations = S.maximal_linear_bias()
-            if p >= 0.6:
-                print(f"However, these equations hold with probability {round(100*p, 2)}%:")
-                for a, b, c in approximations:
-                    print(
-                        ' ',
-                        to_polynomial(b, 'y'),
-                        '=',
-                        to_polynomial(a, 'x'),
-                        '⊕ 1' if c == 1 else ''
-                    )
-                print("where y = S(x).")
-            if p >= 0.75:
-                print("This can be considered as a cryptographic weakness and can lead to linear cryptanalysis.")
-
-
-            # Differential cryptanalysis
-            print()
-            if S.is_differential():
-                p, approximations = S.maximal_differential_bias()
-                print("SBox is differential! For all x,")
-                for a, b in approximations:
-                    if b == 0:
-                        print(f"  S(x) = S(x⊕{a})")
-                    else:
-                        print(f"  S(x)⊕{b} = S(x⊕{a})")
-                print()
-            else:
-                p, approximations = S.maximal_differential_bias()
-                if p >= 0.1:
-                    print(f"These equations hold with probability {round(100*p, 2)}%:")
-                    for a, b in approximations:
-                        print(f"S(x)⊕{b} = S(x⊕{a})")
-                    print("This can be considered as a cryptographic weakness and can lead to differential cryptanalysis.")
-
-                # Linear structures
-                print()
-                linear_structures = S.linear_structures()
-                if len(linear_structures) > 0:
-                    print("The SBox has linear structures! "
-                          "For all x,")
-                    for b, a, c in linear_structures:
-                        print(f"  {b}·(S(x)⊕S(x⊕{a})) = {c}")
-                    print("where · denotes a vector dot product.")
-
-    if args.lat:
+    if args.lat and args.outofcore:
+        debug("Linear Approximation Table (out of core)")
+        out_of_core(S, 'lat', sbox_file)
+
+    elif args.lat:
         debug("Linear Approximation Table")
         table = S.linear_approximation_table()
         format = args.format
@@ -150,7 +116,11 @@ for sbox_file in args.input_files:
         print_table(table, format, filename)
         debug()
 
-    if args.ddt:
+    if args.ddt and args.outofcore:
+        debug("Difference Distribution Table (out of core)")
+        out_of_core(S, 'ddt', sbox_file)
+
+    elif args.ddt:
         debug("Difference Distribution Table")
         table = S.difference_distribution_table()
         format = args.format
@@ -165,7 +135,11 @@ for sbox_file in args.input_files:
         print_table(table, format, filename)
         debug()
 
-    if args.act:
+    if args.act and args.outofcore:
+        debug("Autocorrelation Table (out of core)")
+        out_of_core(S, 'act', sbox_file)
+
+    elif args.act:
         debug("Autocorrelation Table")
         table = S.autocorrelation_table()
         format = args.format
@@ -179,3 +153,5 @@ for sbox_file in args.input_files:
             )
         print_table(table, format, filename)
         debug()
+
+exit(exit_status)
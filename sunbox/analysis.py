@@ -0,0 +1,100 @@
+from collections import namedtuple
+from functools import lru_cache
+import numpy as np
+
+LinearSummary = namedtuple(
+    'LinearSummary',
+    ['is_linear', 'is_affine', 'probability', 'approximations']
+)
+
+DifferentialSummary = namedtuple(
+    'DifferentialSummary',
+    ['is_differential', 'probability', 'approximations',
+     'biryukov_perrin_metric']
+)
+
+class Analysis:
+    """
+    Analysis pipeline of an SBox.
+
+    Each spectrum (LAT, DDT, ACT) is computed at most once, when a
+    statistic first needs it, and every statistic derived from a given
+    table is extracted in a single vectorized sweep over it.
+    Tables that are never asked for are never computed.
+    """
+    def __init__(self, sbox):
+        self.sbox = sbox
+
+    @lru_cache()
+    def linear(self):
+        """
+        Extracts every statistic of the LAT:
+        linearity, affinity, and the maximal linear bias together
+        with the approximations reaching it.
+        See SBox.is_linear, SBox.is_affine and SBox.maximal_linear_bias.
+        """
+        LAT = self.sbox.linear_approximation_array()
+        nrows = 1 << self.sbox.m
+        full = LAT[0, 0]
+
+        zero = LAT == 0
+        positive = LAT == full
+        negative = LAT == -full
+        is_affine = bool(np.all(zero | positive | negative))
+        is_linear = bool(np.all(zero | positive))
+
+        biases = np.abs(LAT[1:, 1:])
+        maximal_bias = biases.max(initial=0)
+        linear_approximations = [
+            (y + 1, x + 1, 0 if LAT[y + 1, x + 1] > 0 else 1)
+            for y, x in np.argwhere(biases == maximal_bias).tolist()
+        ]
+
+        probability = (int(maximal_bias) / nrows) + 0.5
+        return LinearSummary(
+            is_linear, is_affine, probability, linear_approximations
+        )
+
+    @lru_cache()
+    def differential(self):
+        """
+        Extracts every statistic of the DDT:
+        whether the SBox is differential, the maximal differential bias
+        together with the approximations reaching it, and the
+        Biryukov-Perrin metric.
+        See SBox.is_differential, SBox.maximal_differential_bias and
+        SBox.biryukov_perrin_metric.
+        """
+        DDT = self.sbox.difference_distribution_array()
+        nrows = 1 << self.sbox.m
+
+        mask = np.ones(DDT.shape, dtype=bool)
+        mask[0, 0] = False
+        maximal_bias = DDT[mask].max(initial=0)
+        is_differential = bool(maximal_bias == DDT[0, 0])
+        differential_approximations = [
+            tuple(yx)
+            for yx in np.argwhere(mask & (DDT == maximal_bias)).tolist()
+        ]
+
+        excess = DDT[1:, 1:] - 2
+        distance = int(np.sum(excess[excess > 0] ** 2))
+
+        probability = (int(maximal_bias) / nrows)
+        return DifferentialSummary(
+            is_differential, probability, differential_approximations,
+            distance
+        )
+
+    @lru_cache()
+    def linear_structures(self):
+        """
+        Extracts the linear structures from the ACT.
+        See SBox.linear_structures.
+        """
+        m = self.sbox.m
+        ACT = self.sbox.autocorrelation_array()[1:, 1:].T
+        return [
+            (b + 1, a + 1, 0 if ACT[b, a] > 0 else 1)
+            for b, a in np.argwhere(np.abs(ACT) == (1 << m)).tolist()
+        ]
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+"""
+Thin client of the analysis server (see sunbox.server).
+
+Accepts the same options as main.py and produces the same output,
+but delegates all the work to a running server. It only depends on
+the standard library.
+"""
+import argparse
+import os
+import socket
+from sys import stderr
+
+from sunbox import protocol
+from sunbox.options import add_arguments
+
+class Client:
+    """
+    Connection to an analysis server listening on a Unix socket.
+    """
+    def __init__(self, path):
+        self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.socket.connect(path)
+
+    def close(self):
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def request(self, command, sbox=None, text=None,
+                format='ansi', output='stdout'):
+        """
+        Runs a command on the server for the SBox given either as a
+        list of integers (sbox) or as the contents of an SBox file
+        (text), and returns its result.
+        """
+        request = {
+            'command': command,
+            'format': format,
+            'output': output,
+        }
+        if sbox is not None:
+            request['sbox'] = list(sbox)
+        else:
+            request['text'] = text
+
+        self.socket.sendall(protocol.encode(request))
+        response, payload = protocol.receive_frame(self.socket)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        if response.get('binary'):
+            return payload
+        return response['result']
+
+def debug(*args, **kwargs):
+    print(*args, **kwargs, file = stderr, flush = True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description = "Client of the SUnbox analysis server",
+    )
+
+    parser.add_argument(
+        'socket',
+        help = 'Path of the Unix socket of the server'
+    )
+
+    add_arguments(parser)
+
+    args = parser.parse_args()
+
+    tables = [
+        ('lat', "Linear Approximation Table"),
+        ('ddt', "Difference Distribution Table"),
+        ('act', "Autocorrelation Table"),
+    ]
+
+    with Client(args.socket) as client:
+        for sbox_file in args.input_files:
+            debug(sbox_file, '\n')
+            with open(sbox_file, 'r') as file:
+                text = file.read()
+
+            if args.auto:
+                debug("Automatic analysis.")
+                print(client.request('auto', text = text), end = '')
+
+            for command, name in tables:
+                if not getattr(args, command):
+                    continue
+                debug(name)
+                format = args.format
+                if args.output == 'stdout':
+                    print(client.request(command, text = text, format = format))
+                else:
+                    output = client.request(
+                        command, text = text, format = format, output = 'file'
+                    )
+                    filename = os.path.splitext(os.path.basename(sbox_file))[0]
+                    filename = os.path.join(
+                        args.output,
+                        f"{command}_{filename}.{format}"
+                    )
+                    mode = 'wb' if isinstance(output, bytes) else 'w'
+                    with open(filename, mode) as file:
+                        file.write(output)
+                debug()
@@ -1,3 +1,4 @@
+from io import BytesIO
 from PIL import Image
 
 def table_to_csv(table):
@@ -65,7 +66,12 @@ def table_to_png(table):
 
     return image
 
-def print_table(table, format='ansi', filename='stdout'):
+def render_table(table, format='ansi', filename='stdout'):
+    """
+    Returns what print_table outputs for the same arguments:
+    the printed text if filename is 'stdout', and the contents
+    of the written file otherwise (PNG encoded bytes for png).
+    """
     if format == 'ansi':
         output = table_to_ansi(table)
     elif format == 'csv':
@@ -73,13 +79,23 @@ def print_table(table, format='ansi', filename='stdout'):
     elif format == 'png':
         output = table_to_png(table)
 
+    if format != 'png':
+        return output
     if filename == 'stdout':
-        if format == 'png':
-            print(output.tobytes().hex())
-        else:
-            print(output)
-    elif format == 'png':
-        output.save(filename, "png")
+        return output.tobytes().hex()
+
+    buffer = BytesIO()
+    output.save(buffer, "png")
+    return buffer.getvalue()
+
+def print_table(table, format='ansi', filename='stdout'):
+    output = render_table(table, format, filename)
+
+    if filename == 'stdout':
+        print(output)
+    elif isinstance(output, bytes):
+        with open(filename, 'wb') as file:
+            file.write(output)
     else:
         with open(filename, 'w') as file:
             file.write(output)
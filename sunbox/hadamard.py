@@ -1,20 +1,5 @@
 import numpy as np
 
-def walsh_spectrum(array):
-    """
-    In-place Fast Walsh-Hadamard Transform of array
-    """
-    h = 1
-    n = len(array)
-    while h < n:
-        for i in range(0, n, h*2):
-            for j in range(i, i+h):
-                x = array[j]
-                y = array[j+h]
-                array[j]   = x+y
-                array[j+h] = x-y
-        h *= 2
-
 def hadamard_matrix(n):
     """
     Generates a hadamard matrix of size 2^n
@@ -28,3 +13,30 @@ def hadamard_matrix(n):
              np.hstack((h_n_minus_1, -h_n_minus_1)))
         )
         return h_n
+
+def walsh_transform(array, axis=-1, bits=4):
+    """
+    Fast Walsh-Hadamard Transform of a numpy array along the given axis,
+    vectorized over every other axis. Returns a new array.
+
+    The hadamard matrix of size 2^n is the Kronecker product of smaller
+    hadamard matrices, so the transform is computed as a sequence of
+    products by hadamard matrices of size at most 2^bits.
+    Computations are exact as long as values stay below 2^53.
+    """
+    array = np.moveaxis(np.asarray(array), axis, -1)
+    shape = array.shape
+    n = shape[-1].bit_length() - 1
+
+    result = array.reshape(-1, 1 << n).astype(np.float64)
+    done = 0
+    while done < n:
+        size = min(bits, n - done)
+        result = np.matmul(
+            hadamard_matrix(size).astype(np.float64),
+            result.reshape(-1, 1 << size, 1 << done)
+        )
+        done += size
+
+    result = result.reshape(shape).astype(array.dtype)
+    return np.moveaxis(result, -1, axis)
@@ -0,0 +1,56 @@
+"""
+Command-line options shared by main.py and the client of the analysis
+server (see sunbox.client).
+
+This module only depends on the standard library, so that the client
+does not pay for the NumPy and PIL imports.
+"""
+
+def add_arguments(parser):
+    """
+    Adds the input, table, analysis and output options to parser.
+    """
+    parser.add_argument(
+        '-in', '-i',
+        dest = 'input_files',
+        required = True,
+        nargs = '*',
+        help = 'Input file(s) containing the SBoxes to analyze'
+    )
+
+    parser.add_argument(
+        '-lat',
+        action = 'store_true',
+        help = 'Compute the Linear Approximation Table of the SBoxes'
+    )
+
+    parser.add_argument(
+        '-ddt',
+        action = 'store_true',
+        help = 'Compute the Difference Distribution Table of the SBoxes'
+    )
+
+    parser.add_argument(
+        '-act',
+        action = 'store_true',
+        help = 'Compute the Autocorrelation Table of the SBoxes'
+    )
+
+    parser.add_argument(
+        '-auto',
+        action = 'store_true',
+        help = 'Performs an automatic analysis of the SBoxes and outputs relevant information'
+    )
+
+    parser.add_argument(
+        '-format',
+        choices = ['ansi', 'csv', 'png'],
+        default = 'ansi',
+        help = 'Output format for the tables',
+    )
+
+    parser.add_argument(
+        '-output', '-out',
+        default = 'stdout',
+        help = 'Output directory path or "stdout" to print to standard output'
+    )
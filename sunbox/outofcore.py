@@ -0,0 +1,432 @@
+"""
+Out-of-core analysis of wide SBoxes.
+
+The DDT, ACT and LAT of an SBox with m input bits have 2^m rows of
+2^n coefficients each, which cannot be held in memory for 20 to 24-bit
+SBoxes. Here they are computed by blocks of rows in a pool of worker
+processes. Only running aggregates
+are kept in memory: the maximal coefficient, the histogram of the
+coefficients and the top-k coefficients.
+
+Tables can optionally be written to a memory-mapped file, and progress
+is checkpointed so that an interrupted run can be resumed.
+Aggregates only cover the non-trivial coefficients: the row a = 0 of
+the DDT, and the row a = 0 and column b = 0 of the LAT and of the ACT,
+are left out, as in SBox.maximal_differential_bias,
+SBox.maximal_linear_bias and SBox.linear_structures.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+
+from sunbox.hadamard import walsh_transform
+
+Summary = namedtuple(
+    'Summary',
+    ['table', 'maximum', 'probability', 'histogram', 'top']
+)
+
+class CheckpointMismatch(ValueError):
+    """
+    Raised when a checkpoint was written by a different computation.
+    """
+
+class StorageTooLarge(ValueError):
+    """
+    Raised when a table does not fit in the filesystem it is stored on.
+    """
+
+_worker = {}
+
+def _initialize(S, n, table, path):
+    _worker['S'] = S
+    _worker['n'] = n
+    _worker['table'] = table
+    _worker['path'] = path
+
+def parity(x):
+    """
+    Returns the parity of the number of bits set in each element of x.
+    """
+    x = x ^ (x >> 16)
+    x = x ^ (x >> 8)
+    x = x ^ (x >> 4)
+    x = x ^ (x >> 2)
+    x = x ^ (x >> 1)
+    return x & 1
+
+def ddt_rows(S, n, start, stop):
+    """
+    Returns the rows start to stop (excluded) of the DDT of S.
+    """
+    x = np.arange(len(S))
+    rows = np.empty((stop - start, 1 << n), dtype=np.int32)
+    for a in range(start, stop):
+        rows[a - start] = np.bincount(S ^ S[x ^ a], minlength=1 << n)
+    return rows
+
+def lat_rows(S, n, start, stop):
+    """
+    Returns the rows start to stop (excluded) of the LAT of S.
+
+    Row a of the LAT is the Walsh-Hadamard transform of the function
+    y -> Σ (-1)^(a·x) over all x such that S(x) = y, halved.
+    """
+    x = np.arange(len(S))
+    rows = np.empty((stop - start, 1 << n), dtype=np.int32)
+    for a in range(start, stop):
+        signs = 1 - 2 * parity(x & a)
+        graph = np.bincount(S, weights=signs, minlength=1 << n)
+        rows[a - start] = walsh_transform(graph.astype(np.int64)) // 2
+    return rows
+
+def _aggregate(values, top):
+    """
+    Returns the maximal absolute value, the histogram and the flat
+    indices of the top entries of a block of coefficients, ties being
+    broken by position.
+    """
+    magnitudes = np.abs(values).ravel()
+    if len(magnitudes) == 0:
+        return 0, {}, np.array([], dtype=np.int64)
+
+    counts = np.bincount(magnitudes)
+    histogram = {
+        int(value): int(counts[value]) for value in np.flatnonzero(counts)
+    }
+
+    k = min(top, len(magnitudes))
+    if k == 0:
+        return int(magnitudes.max()), histogram, np.array([], dtype=np.int64)
+
+    # Among coefficients equal to the k-th largest one, keep the first
+    # ones in row-major order, so that the result does not depend on
+    # how the table is split into blocks
+    threshold = np.partition(magnitudes, len(magnitudes) - k)[-k]
+    above = np.flatnonzero(magnitudes > threshold)
+    ties = np.flatnonzero(magnitudes == threshold)[:k - len(above)]
+    best = np.concatenate((above, ties))
+    return int(magnitudes.max()), histogram, best
+
+def _compute_block(start, stop, top):
+    """
+    Computes a block of the table in a worker process, stores it if
+    a file was given, and returns its aggregates.
+    """
+    S = _worker['S']
+    n = _worker['n']
+    table = _worker['table']
+    path = _worker['path']
+    nrows = len(S)
+    ncols = 1 << n
+
+    if table == 'ddt':
+        block = ddt_rows(S, n, start, stop)
+    elif table == 'act':
+        block = walsh_transform(ddt_rows(S, n, start, stop))
+    else:
+        block = lat_rows(S, n, start, stop)
+
+    if path is not None:
+        storage = np.memmap(path, dtype=np.int32, mode='r+',
+                            shape=(nrows, ncols))
+        storage[start:stop] = block
+        storage.flush()
+        del storage
+
+    # Leave out the trivial coefficients
+    first = 1 if start == 0 else 0
+    skip = 0 if table == 'ddt' else 1
+    values = block[first:, skip:]
+    maximum, histogram, best = _aggregate(values, top)
+
+    a, b = np.unravel_index(best, values.shape)
+    a = a + start + first
+    b = b + skip
+    entries = [
+        (int(a[k]), int(b[k]), int(block[a[k] - start, b[k]]))
+        for k in range(len(best))
+    ]
+    return maximum, histogram, entries
+
+class OutOfCore:
+    """
+    Out-of-core computation of the DDT, the ACT or the LAT of an SBox.
+
+    If directory is given, the table is written there as a memory-mapped
+    file of 32-bit integers (see table_path), indexed as in
+    difference_distribution_table, autocorrelation_table and
+    linear_approximation_table,
+    and progress is checkpointed every checkpoint_interval seconds.
+    Running again with the same directory resumes the computation.
+    """
+    def __init__(self, sbox, table='ddt', directory=None, store=True,
+                 block_size=None, workers=None, top=16,
+                 checkpoint_interval=60):
+        if table not in ('ddt', 'act', 'lat'):
+            raise ValueError(f"Unknown table: {table!r}")
+
+        self.S = np.asarray(sbox.S_list, dtype=np.int32)
+        self.m = sbox.m
+        self.n = sbox.n
+        self.table = table
+        self.directory = directory
+        self.store = store and directory is not None
+        if block_size is None:
+            block_size = max(1, (1 << 24) >> self.n)
+        self.block_size = block_size
+        self.workers = workers
+        self.top = top
+        self.checkpoint_interval = checkpoint_interval
+
+        if len(self.S) != 1 << self.m:
+            raise ValueError("The size of the SBox must be a power of two")
+
+        self.digest = hashlib.sha256(self.S.tobytes()).hexdigest()
+        # Blocks 0 to completed (excluded) are done, as well as the
+        # blocks in done, which completed out of order
+        self.completed = 0
+        self.done = set()
+        self.maximum = 0
+        self.histogram = {}
+        self.entries = []
+
+    @property
+    def table_path(self):
+        if not self.store:
+            return None
+        return os.path.join(self.directory, f"{self.table}.int32")
+
+    @property
+    def checkpoint_path(self):
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, f"{self.table}.checkpoint.json")
+
+    @property
+    def nblocks(self):
+        return ((1 << self.m) + self.block_size - 1) // self.block_size
+
+    def block(self, i):
+        """
+        Returns the range of rows of block i.
+        """
+        start = i * self.block_size
+        return start, min(start + self.block_size, 1 << self.m)
+
+    @property
+    def ndone(self):
+        return self.completed + len(self.done)
+
+    def mark_done(self, i):
+        """
+        Records that block i is done.
+        """
+        self.done.add(i)
+        while self.completed in self.done:
+            self.done.remove(self.completed)
+            self.completed += 1
+
+    def merge(self, maximum, histogram, entries):
+        """
+        Merges the aggregates of a block into the running aggregates.
+        """
+        self.maximum = max(self.maximum, maximum)
+        for value, count in histogram.items():
+            self.histogram[value] = self.histogram.get(value, 0) + count
+        self.entries = sorted(
+            self.entries + [tuple(entry) for entry in entries],
+            key=lambda entry: (-abs(entry[2]), entry[0], entry[1])
+        )[:self.top]
+
+    def parameters(self):
+        return {
+            'table': self.table,
+            'm': self.m,
+            'n': self.n,
+            'digest': self.digest,
+            'block_size': self.block_size,
+            'top': self.top,
+            'store': self.store,
+        }
+
+    def snapshot(self):
+        """
+        Returns the current progress as a checkpoint, which shares no
+        mutable state with the running aggregates.
+        """
+        return {
+            'parameters': self.parameters(),
+            'completed': self.completed,
+            'done': sorted(self.done),
+            'maximum': self.maximum,
+            'histogram': dict(self.histogram),
+            'top': list(self.entries),
+        }
+
+    def save_checkpoint(self, checkpoint):
+        if self.checkpoint_path is None:
+            return
+        temporary = self.checkpoint_path + '.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(checkpoint, file)
+        os.replace(temporary, self.checkpoint_path)
+
+    def load_checkpoint(self):
+        """
+        Restores the progress of a previous run, if any.
+        Returns whether a checkpoint was found.
+        """
+        if self.checkpoint_path is None \
+                or not os.path.exists(self.checkpoint_path):
+            return False
+
+        with open(self.checkpoint_path, 'r') as file:
+            checkpoint = json.load(file)
+        if checkpoint['parameters'] != self.parameters():
+            raise CheckpointMismatch(
+                f"{self.checkpoint_path} belongs to a different computation "
+                f"(another SBox, block size, top-k or storage option)"
+            )
+
+        self.completed = checkpoint['completed']
+        self.done = set(checkpoint['done'])
+        self.maximum = checkpoint['maximum']
+        self.histogram = {
+            int(value): count
+            for value, count in checkpoint['histogram'].items()
+        }
+        self.entries = [tuple(entry) for entry in checkpoint['top']]
+        return True
+
+    @property
+    def table_size(self):
+        return (1 << self.m) * (1 << self.n) * np.dtype(np.int32).itemsize
+
+    def check_storage(self):
+        """
+        Raises StorageTooLarge if the table is larger than the maximal
+        file size or than the free space of the output directory.
+        """
+        size = self.table_size
+        try:
+            bits = os.pathconf(self.directory, 'PC_FILESIZEBITS')
+        except (OSError, ValueError):
+            bits = -1
+        if bits > 0 and size >= 1 << (bits - 1):
+            raise StorageTooLarge(
+                f"The {self.table} needs {size} bytes, more than the maximal "
+                f"file size of {self.directory}"
+            )
+
+        status = os.statvfs(self.directory)
+        available = status.f_bavail * status.f_frsize
+        if size > available:
+            raise StorageTooLarge(
+                f"The {self.table} needs {size} bytes, but only {available} "
+                f"bytes are available in {self.directory}"
+            )
+
+    def prepare_storage(self):
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+        if self.table_path is None or os.path.exists(self.table_path):
+            return
+
+        self.check_storage()
+        try:
+            storage = np.memmap(self.table_path, dtype=np.int32, mode='w+',
+                                shape=(1 << self.m, 1 << self.n))
+            del storage
+        except OSError as error:
+            if os.path.exists(self.table_path):
+                os.remove(self.table_path)
+            raise StorageTooLarge(
+                f"Cannot create {self.table_path}: {error.strerror}"
+            ) from error
+
+    def summary(self):
+        if self.table == 'ddt':
+            probability = self.maximum / (1 << self.m)
+        elif self.table == 'act':
+            probability = self.maximum / (1 << (self.m + 1)) + 0.5
+        else:
+            probability = self.maximum / (1 << self.m) + 0.5
+        return Summary(
+            self.table,
+            self.maximum,
+            probability,
+            dict(sorted(self.histogram.items())),
+            list(self.entries),
+        )
+
+    def run(self, progress=None):
+        """
+        Computes every remaining block and returns the Summary of the
+        table. progress, if given, is called with the number of
+        completed blocks and the total number of blocks.
+        """
+        self.prepare_storage()
+        self.load_checkpoint()
+        checkpoint = self.snapshot()
+
+        remaining = (
+            i for i in range(self.completed, self.nblocks)
+            if i not in self.done
+        )
+        last_checkpoint = time.monotonic()
+        # Only a few blocks per worker are in flight at any time,
+        # so that millions of blocks can be scheduled in constant memory
+        window = 2 * (self.workers or os.cpu_count() or 1)
+
+        try:
+            with ProcessPoolExecutor(
+                self.workers,
+                initializer=_initialize,
+                initargs=(self.S, self.n, self.table, self.table_path),
+            ) as pool:
+                futures = {}
+
+                def submit_next():
+                    i = next(remaining, None)
+                    if i is not None:
+                        future = pool.submit(
+                            _compute_block, *self.block(i), self.top
+                        )
+                        futures[future] = i
+
+                for _ in range(window):
+                    submit_next()
+
+                try:
+                    while futures:
+                        finished, _ = wait(
+                            futures, return_when=FIRST_COMPLETED
+                        )
+                        for future in finished:
+                            i = futures.pop(future)
+                            self.merge(*future.result())
+                            self.mark_done(i)
+                            # Only snapshots of fully merged blocks are
+                            # saved, so that an interruption in the middle
+                            # cannot count a block twice on resume
+                            checkpoint = self.snapshot()
+                            submit_next()
+                            if progress is not None:
+                                progress(self.ndone, self.nblocks)
+                        now = time.monotonic()
+                        if now - last_checkpoint >= self.checkpoint_interval:
+                            self.save_checkpoint(checkpoint)
+                            last_checkpoint = now
+                except BaseException:
+                    for future in futures:
+                        future.cancel()
+                    raise
+        finally:
+            self.save_checkpoint(checkpoint)
+
+        return self.summary()
@@ -0,0 +1,90 @@
+"""
+Wire protocol shared by the analysis server and its client.
+
+Every message is a frame made of a header, a JSON document and an
+optional binary payload. The header holds the byte lengths of the JSON
+document and of the payload, as two big-endian unsigned 32-bit integers.
+
+This module only depends on the standard library, so that the client
+does not pay for the NumPy and PIL imports.
+"""
+import json
+import struct
+
+HEADER = struct.Struct('>II')
+
+class FrameTooLarge(ValueError):
+    """
+    Raised when a frame announces more bytes than the reader accepts.
+    """
+
+def encode(message, payload=b''):
+    """
+    Encodes a JSON-serializable message and a binary payload as a frame.
+    """
+    document = json.dumps(message).encode()
+    return HEADER.pack(len(document), len(payload)) + document + payload
+
+def decode_header(header):
+    """
+    Returns the lengths of the JSON document and of the payload
+    announced by a frame header.
+    """
+    return HEADER.unpack(header)
+
+def decode_body(body, document_length):
+    """
+    Splits the body of a frame into its message and its binary payload.
+    """
+    message = json.loads(body[:document_length].decode())
+    return message, body[document_length:]
+
+async def read_raw_frame(reader, maximum=None):
+    """
+    Reads a frame from an asyncio StreamReader.
+    Returns the undecoded JSON document and the binary payload.
+    If maximum is given, frames whose body is larger than maximum bytes
+    are rejected with FrameTooLarge before their body is read.
+    """
+    document_length, payload_length = decode_header(
+        await reader.readexactly(HEADER.size)
+    )
+    if maximum is not None and document_length + payload_length > maximum:
+        raise FrameTooLarge(
+            f"Frame of {document_length + payload_length} bytes exceeds "
+            f"the maximum of {maximum} bytes"
+        )
+    body = await reader.readexactly(document_length + payload_length)
+    return body[:document_length], body[document_length:]
+
+async def read_frame(reader, maximum=None):
+    """
+    Reads a frame from an asyncio StreamReader.
+    Returns the message and the binary payload.
+    See read_raw_frame for maximum.
+    """
+    document, payload = await read_raw_frame(reader, maximum)
+    return json.loads(document.decode()), payload
+
+def receive_exactly(sock, size):
+    """
+    Reads exactly size bytes from a blocking socket.
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed by the server")
+        data += chunk
+    return bytes(data)
+
+def receive_frame(sock):
+    """
+    Reads a frame from a blocking socket.
+    Returns the message and the binary payload.
+    """
+    document_length, payload_length = decode_header(
+        receive_exactly(sock, HEADER.size)
+    )
+    body = receive_exactly(sock, document_length + payload_length)
+    return decode_body(body, document_length)
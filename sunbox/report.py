@@ -0,0 +1,87 @@
+from sunbox.format import to_polynomial
+
+def automatic_analysis(S):
+    """
+    Performs an automatic analysis of the SBox S and prints
+    relevant information on standard output.
+    """
+    # Linear cryptanalysis
+    if not S.is_bijective():
+        print("Warning: The SBox is not bijective.")
+    if S.is_linear():
+        print("SBox is linear! It is equivalent to the following matrix M:")
+        for line in S.matrix_equivalent():
+            print(*line)
+        print("That is, SBox(x) = M·x for all x. "
+              "(x represented as a column binary vector)")
+    elif S.is_xor():
+        print("SBox is a simple XOR! It is equivalent to the following equation:")
+        print(f"    S(x) = x ⊕ {S[0]}")
+    elif S.is_affine():
+        print("SBox is affine! It is equivalent to the following matrices A, B:")
+        A, B = S.affine_equivalent()
+        for y in range(S.n):
+            print(*A[y], ' \t ', B[y][0])
+        print("That is, SBox(x) = A·x ⊕ B for all x. "
+              "(x represented as a column binary vector)")
+    else:
+        print("SBox is not linear.")
+        p, approximations = S.maximal_linear_bias()
+        if p >= 0.6:
+            print(f"However, these equations hold with probability {round(100*p, 2)}%:")
+            for a, b, c in approximations:
+                print(
+                    ' ',
+                    to_polynomial(b, 'y'),
+                    '=',
+                    to_polynomial(a, 'x'),
+                    '⊕ 1' if c == 1 else ''
+                )
+            print("where y = S(x).")
+        if p >= 0.75:
+            print("This can be considered as a cryptographic weakness and can lead to linear cryptanalysis.")
+
+
+        # Differential cryptanalysis
+        print()
+        if S.is_differential():
+            p, approximations = S.maximal_differential_bias()
+            print("SBox is differential! For all x,")
+            for a, b in approximations:
+                if b == 0:
+                    print(f"  S(x) = S(x⊕{a})")
+                else:
+                    print(f"  S(x)⊕{b} = S(x⊕{a})")
+            print()
+        else:
+            p, approximations = S.maximal_differential_bias()
+            if p >= 0.1:
+                print(f"These equations hold with probability {round(100*p, 2)}%:")
+                for a, b in approximations:
+                    print(f"S(x)⊕{b} = S(x⊕{a})")
+                print("This can be considered as a cryptographic weakness and can lead to differential cryptanalysis.")
+
+            # Linear structures
+            print()
+            linear_structures = S.linear_structures()
+            if len(linear_structures) > 0:
+                print("The SBox has linear structures! "
+                      "For all x,")
+                for b, a, c in linear_structures:
+                    print(f"  {b}·(S(x)⊕S(x⊕{a})) = {c}")
+                print("where · denotes a vector dot product.")
+
+def print_summary(summary):
+    """
+    Prints the aggregates of a table computed out of core
+    (see sunbox.outofcore).
+    """
+    name = summary.table.upper()
+    print(f"Maximal coefficient: {summary.maximum} "
+          f"(probability {round(100*summary.probability, 2)}%)")
+    print("Histogram of the absolute values of the coefficients:")
+    for value, count in summary.histogram.items():
+        print(f"  {value}: {count}")
+    print("Largest coefficients:")
+    for a, b, value in summary.top:
+        print(f"  {name}[{a}][{b}] = {value}")
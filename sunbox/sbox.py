@@ -3,6 +3,7 @@ import numpy as np
 import heapq
 from functools import lru_cache
 from sunbox.hadamard import *
+from sunbox.analysis import Analysis
 
 class SBox:
     def __init__(self, *args):
@@ -41,8 +42,16 @@ class SBox:
         If the base is not specified, it is automatically detected.
         """
         with open(filename, 'r') as file:
-            array = re.split(sep, file.read().lower())
-            array = list(filter(lambda x: x != '', array))
+            return cls.from_string(file.read(), sep, base)
+
+    @classmethod
+    def from_string(cls, text, sep=' |,|;|\t|\r|\n', base=None):
+        """
+        Reads a SBox from a string, in the same format as from_file.
+        If the base is not specified, it is automatically detected.
+        """
+        array = re.split(sep, text.lower())
+        array = list(filter(lambda x: x != '', array))
 
         if base is None:
             if any(x in 'abcdef' for y in array for x in y):
@@ -55,6 +64,31 @@ class SBox:
         array = map(lambda x: int(x, base), array)
         return cls(array)
 
+    @lru_cache()
+    def analysis(self):
+        """
+        Returns the Analysis pipeline of this SBox, which computes each
+        table at most once and extracts all its statistics at once.
+        """
+        return Analysis(self)
+
+    @lru_cache()
+    def linear_approximation_array(self):
+        """
+        Returns the Linear Approximation Table (LAT) for this SBox
+        as a numpy array. See linear_approximation_table.
+
+        The LAT is the two-dimensional Walsh-Hadamard transform of the
+        graph of the SBox, halved.
+        """
+        nrows = 1 << self.m
+        ncols = 1 << self.n
+
+        graph = np.zeros((nrows, ncols), dtype=np.int64)
+        graph[np.arange(nrows), self.S_list[:nrows]] = 1
+        A = walsh_transform(walsh_transform(graph, axis=1), axis=0)
+        return A // 2
+
     @lru_cache()
     def linear_approximation_table(self):
         """
@@ -65,19 +99,23 @@ class SBox:
         Absolute bias scale is used, therefore the actual value
         corresponds to the probability - 1/2, multiplied by 2^m.
         """
+        return self.linear_approximation_array().tolist()
+
+    @lru_cache()
+    def difference_distribution_array(self):
+        """
+        Returns the Difference Distribution Table (DDT) for this SBox
+        as a numpy array. See difference_distribution_table.
+        """
         nrows = 1 << self.m
         ncols = 1 << self.n
 
-        A = [[None] * ncols for _ in range(nrows)]
-        for i in range(ncols):
-            row = []
-            for j in range(nrows):
-                row.append(1 - (((i & self.S_list[j]).bit_count() & 1)*2))
-            walsh_spectrum(row)
-            for j in range(nrows):
-                A[j][i] = row[j] // 2
-
-        return A
+        S = np.array(self.S_list[:nrows], dtype=np.int64)
+        x = np.arange(nrows)
+        a = x[:, np.newaxis]
+        index = a * ncols + (S[x] ^ S[x ^ a])
+        A = np.bincount(index.ravel(), minlength=nrows * ncols)
+        return A.reshape(nrows, ncols)
 
     @lru_cache()
     def difference_distribution_table(self):
@@ -87,16 +125,18 @@ class SBox:
 
         Values are multiplied by 2^m to remain integers.
         """
-        nrows = 1 << self.m
-        ncols = 1 << self.n
+        return self.difference_distribution_array().tolist()
 
-        A = [[0] * ncols for _ in range(nrows)]
-        for i in range(nrows):
-            si = self.S_list[i]
-            for di in range(nrows):
-                A[di][si^self.S_list[i^di]] += 1
+    @lru_cache()
+    def autocorrelation_array(self):
+        """
+        Returns the Autocorrelation Table (ACT) for this SBox
+        as a numpy array. See autocorrelation_table.
 
-        return A
+        Each row of the ACT is the Walsh-Hadamard transform of the
+        corresponding row of the DDT.
+        """
+        return walsh_transform(self.difference_distribution_array())
 
     @lru_cache()
     def autocorrelation_table(self):
@@ -108,10 +148,7 @@ class SBox:
         Absolute bias scale is used, therefore the actual value
         corresponds to the probability - 1/2, multiplied by 2^m.
         """
-        ddt = np.matrix(self.difference_distribution_table())
-        had = hadamard_matrix(self.n)
-        A = ddt * had
-        return A.tolist()
+        return self.autocorrelation_array().tolist()
 
     @lru_cache()
     def linear_structures(self):
@@ -120,17 +157,7 @@ class SBox:
         b·(S(x)⊕S(x⊕a)) = c for all x, where · denotes a vector dot
         product.
         """
-        n = self.n
-        m = self.m
-        act = self.autocorrelation_table()
-        ret = []
-        for b in range(1, 1 << n):
-            for a in range(1, 1 << m):
-                if abs(act[a][b]) == (1 << m):
-                    c = ((1 - (act[a][b] >> m)) >> 1)
-                    ret.append((b, a, c))
-
-        return ret
+        return self.analysis().linear_structures()
 
     @lru_cache()
     def is_linear(self):
@@ -139,16 +166,7 @@ class SBox:
         that is, there exists a binary matrix M such that S(x) = M·x,
         where x is expressed as a column binary vector.
         """
-        LAT = self.linear_approximation_table()
-        nrows = 1 << self.m
-        ncols = 1 << self.n
-
-        for y in range(nrows):
-            for x in range(ncols):
-                if LAT[y][x] not in (LAT[0][0], 0):
-                    return False
-
-        return True
+        return self.analysis().linear().is_linear
 
     @lru_cache()
     def is_xor(self):
@@ -170,16 +188,7 @@ class SBox:
         column vector b such that S(x) = A·x ⊕ b,
         where x is expressed as a column binary vector.
         """
-        LAT = self.linear_approximation_table()
-        nrows = 1 << self.m
-        ncols = 1 << self.n
-
-        for y in range(nrows):
-            for x in range(ncols):
-                if abs(LAT[y][x]) not in (LAT[0][0], 0):
-                    return False
-
-        return True
+        return self.analysis().linear().is_affine
 
     @lru_cache()
     def matrix_equivalent(self):
@@ -191,13 +200,11 @@ class SBox:
         if not self.is_linear():
             return None
 
-        LAT = self.linear_approximation_table()
+        LAT = self.linear_approximation_array()
         M = []
         for bit in range(self.n):
             col = 1 << bit
-            row = 0
-            while LAT[row][col] == 0:
-                row += 1
+            row = int(np.flatnonzero(LAT[:, col])[0])
             binary_vector = [
                 (row >> x) & 1 for x in range(self.m)
             ]
@@ -216,14 +223,12 @@ class SBox:
         if not self.is_affine():
             return None
 
-        LAT = self.linear_approximation_table()
+        LAT = self.linear_approximation_array()
         A = []
         B = []
         for bit in range(self.n):
             col = 1 << bit
-            row = 0
-            while LAT[row][col] == 0:
-                row += 1
+            row = int(np.flatnonzero(LAT[:, col])[0])
 
             binary_vector = [
                 (row >> x) & 1 for x in range(self.m)
@@ -248,44 +253,15 @@ class SBox:
         a·x = b·S(x)⊕c with probability p, where · denotes a vector
         dot product.
         """
-        nrows = 1 << self.m
-        ncols = 1 << self.n
-
-        maximal_bias = 0
-        linear_approximations = []
-
-        LAT = self.linear_approximation_table()
-
-        for y in range(1, ncols):
-            for x in range(1, nrows):
-                if abs(LAT[y][x]) > maximal_bias:
-                    maximal_bias = abs(LAT[y][x])
-                    linear_approximations = []
-
-                if abs(LAT[y][x]) >= maximal_bias:
-                    c = 0 if LAT[y][x] > 0 else 1
-                    linear_approximations.append((y, x, c))
-
-        probability = (maximal_bias / nrows) + 0.5
-        return probability, linear_approximations
+        linear = self.analysis().linear()
+        return linear.probability, linear.approximations
 
     @lru_cache()
     def is_differential(self):
         """
         Checks whether S(x)⊕b = S(x⊕a) for some a, b.
         """
-        nrows = 1 << self.m
-        ncols = 1 << self.n
-
-        DDT = self.difference_distribution_table()
-
-        for y in range(ncols):
-            for x in range(nrows):
-                if (x, y) == (0, 0):
-                    continue
-                if DDT[y][x] == DDT[0][0]:
-                    return True
-        return False
+        return self.analysis().differential().is_differential
 
     @lru_cache()
     def is_bijective(self):
@@ -307,27 +283,8 @@ class SBox:
         then a list of two-tuples (a, b), meaning that
         S(x)⊕b = S(x⊕a) with probability p.
         """
-        nrows = 1 << self.m
-        ncols = 1 << self.n
-
-        maximal_bias = 0
-        differential_approximations = []
-
-        DDT = self.difference_distribution_table()
-
-        for y in range(0, ncols):
-            for x in range(0, nrows):
-                if (x, y) == (0, 0):
-                    continue
-                if DDT[y][x] > maximal_bias:
-                    maximal_bias = DDT[y][x]
-                    differential_approximations = []
-
-                if DDT[y][x] >= maximal_bias:
-                    differential_approximations.append((y, x))
-
-        probability = (maximal_bias / nrows)
-        return probability, differential_approximations
+        differential = self.analysis().differential()
+        return differential.probability, differential.approximations
 
     @lru_cache()
     def biryukov_perrin_metric(self):
@@ -336,18 +293,7 @@ class SBox:
         M(s) = Σl≥2 Nl(l−2)², where Nl counts coefficients with value
         l in the DDT of the SBox.
         """
-        nrows = 1 << self.m
-        ncols = 1 << self.n
-
-        DDT = self.difference_distribution_table()
-        distance = 0
-
-        for y in range(1, ncols):
-            for x in range(1, nrows):
-                if DDT[y][x] > 2:
-                    distance += (DDT[y][x] - 2) ** 2
-
-        return distance
+        return self.analysis().differential().biryukov_perrin_metric
 
     def break_arithmetic(self):
         """
@@ -0,0 +1,389 @@
+#!/usr/bin/env python
+"""
+Long-running analysis server.
+
+Exposes the SBox analyses and table exports over a Unix socket, using
+the frames described in sunbox.protocol. A request is a JSON message:
+
+    {
+        "sbox": [3, 14, 1, ...],    # or "text": contents of an SBox file
+        "command": "lat",           # "lat", "ddt", "act", "auto" or
+                                    # one of the analyses in ANALYSES
+        "format": "ansi",           # table format, as in print_table
+        "output": "stdout"          # "stdout" or "file"
+    }
+
+The response is either {"result": ...}, {"binary": true} with the
+result as binary payload (PNG files), or {"error": "..."}.
+
+Encoded responses are kept in a cache shared by all clients, and the
+actual computations run in a pool of worker processes, each of them
+keeping its most recently used tables warm as numpy arrays.
+Both caches are bounded by their size in bytes.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import signal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import redirect_stdout
+from functools import lru_cache
+from io import StringIO
+
+from sunbox.sbox import SBox
+from sunbox.format import render_table
+from sunbox.report import automatic_analysis
+from sunbox import protocol
+
+TABLES = {
+    'lat': 'linear_approximation_table',
+    'ddt': 'difference_distribution_table',
+    'act': 'autocorrelation_table',
+}
+
+ANALYSES = (
+    'is_bijective',
+    'is_linear',
+    'is_xor',
+    'is_affine',
+    'matrix_equivalent',
+    'affine_equivalent',
+    'maximal_linear_bias',
+    'is_differential',
+    'maximal_differential_bias',
+    'linear_structures',
+    'biryukov_perrin_metric',
+)
+
+FORMATS = ('ansi', 'csv', 'png')
+OUTPUTS = ('stdout', 'file')
+
+MEGABYTE = 1 << 20
+
+_tables = OrderedDict()
+_worker = {'tables_size': 0, 'tables_limit': 512 * MEGABYTE}
+
+def _initialize(tables_limit):
+    _worker['tables_limit'] = tables_limit
+
+def cached_table(sbox, name, compute):
+    """
+    Returns the table name of sbox from the table cache of the worker,
+    computing it with compute(sbox) if needed. The least recently used
+    tables are dropped once the cache exceeds its size limit.
+    """
+    key = tuple(sbox.S_list), name
+    if key in _tables:
+        _tables.move_to_end(key)
+        return _tables[key]
+
+    table = compute(sbox)
+    _tables[key] = table
+    _worker['tables_size'] += table.nbytes
+    while _worker['tables_size'] > _worker['tables_limit'] \
+            and len(_tables) > 1:
+        _, evicted = _tables.popitem(last=False)
+        _worker['tables_size'] -= evicted.nbytes
+    return table
+
+class WorkerSBox(SBox):
+    """
+    SBox whose tables are kept in the bounded table cache of the worker
+    instead of the caches of SBox, which are bounded by count only.
+    The list forms of the tables are not kept at all.
+    """
+    def linear_approximation_array(self):
+        return cached_table(
+            self, 'lat', SBox.linear_approximation_array.__wrapped__
+        )
+
+    def difference_distribution_array(self):
+        return cached_table(
+            self, 'ddt', SBox.difference_distribution_array.__wrapped__
+        )
+
+    def autocorrelation_array(self):
+        return cached_table(
+            self, 'act', SBox.autocorrelation_array.__wrapped__
+        )
+
+    def linear_approximation_table(self):
+        return self.linear_approximation_array().tolist()
+
+    def difference_distribution_table(self):
+        return self.difference_distribution_array().tolist()
+
+    def autocorrelation_table(self):
+        return self.autocorrelation_array().tolist()
+
+@lru_cache(maxsize=32)
+def load_sbox(S):
+    """
+    Returns the SBox built from the tuple S, so that the analyses it
+    caches are reused between requests handled by the same worker.
+    """
+    return WorkerSBox(S)
+
+def parse_sbox(source):
+    """
+    Returns the SBox given by the 'sbox' (list of integers) or 'text'
+    (contents of an SBox file) field of a request.
+    """
+    kind, value = source
+    if kind == 'text':
+        value = SBox.from_string(value).S_list
+    return load_sbox(tuple(value))
+
+def run(source, command, format='ansi', output='stdout'):
+    """
+    Executes a single request on the SBox given by source
+    (see parse_sbox). This is the function run by the worker processes.
+    """
+    sbox = parse_sbox(source)
+
+    if command == 'auto':
+        buffer = StringIO()
+        with redirect_stdout(buffer):
+            automatic_analysis(sbox)
+        return buffer.getvalue()
+
+    if command in TABLES:
+        table = getattr(sbox, TABLES[command])()
+        filename = 'stdout' if output == 'stdout' else None
+        return render_table(table, format, filename)
+
+    return getattr(sbox, command)()
+
+class Server:
+    """
+    Analysis server listening on a Unix socket.
+    At most cache_size bytes of responses are kept, least recently used
+    first out, and each worker keeps at most tables_size bytes of tables.
+    Requests larger than max_frame bytes are rejected.
+    """
+    def __init__(self, path, workers=None, cache_size=256 * MEGABYTE,
+                 tables_size=512 * MEGABYTE, max_frame=64 * MEGABYTE):
+        self.path = path
+        self.max_frame = max_frame
+        self.workers = workers
+        self.cache_size = cache_size
+        self.tables_size = tables_size
+        self.cache = OrderedDict()
+        self.cached_bytes = 0
+        self.pending = {}
+        self.pool = None
+
+    def parse_request(self, request):
+        """
+        Validates a request and returns the arguments of run:
+        (source, command, format, output).
+        The SBox itself is only parsed by the worker.
+        """
+        command = request.get('command')
+        if command not in TABLES and command not in ANALYSES \
+                and command != 'auto':
+            raise ValueError(f"Unknown command: {command!r}")
+
+        if 'sbox' in request:
+            source = 'sbox', request['sbox']
+        elif 'text' in request:
+            source = 'text', request['text']
+        else:
+            raise ValueError("Missing SBox: expected 'sbox' or 'text'")
+
+        if command not in TABLES:
+            return source, command, None, None
+
+        format = request.get('format', 'ansi')
+        output = request.get('output', 'stdout')
+        if format not in FORMATS:
+            raise ValueError(f"Unknown format: {format!r}")
+        if output not in OUTPUTS:
+            raise ValueError(f"Unknown output: {output!r}")
+        return source, command, format, output
+
+    def new_pool(self):
+        return ProcessPoolExecutor(
+            self.workers,
+            initializer=_initialize,
+            initargs=(self.tables_size,),
+        )
+
+    def restart_pool(self, pool):
+        """
+        Replaces the process pool if it is still the given broken pool,
+        for instance after a worker was killed.
+        """
+        if self.pool is pool:
+            pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = self.new_pool()
+
+    def submit(self, key, arguments):
+        """
+        Returns a future holding the result of run(*arguments), and the
+        pool it runs in. Identical requests submitted while the first
+        one is being computed share its future.
+        """
+        if key in self.pending:
+            return self.pending[key]
+
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.pool, run, *arguments)
+        self.pending[key] = future, self.pool
+
+        def forget(future):
+            if self.pending.get(key, (None,))[0] is future:
+                del self.pending[key]
+
+        future.add_done_callback(forget)
+        return future, self.pool
+
+    def store(self, key, frame):
+        """
+        Keeps a response frame in cache, dropping the least recently
+        used ones beyond cache_size bytes.
+        """
+        if key in self.cache or len(frame) > self.cache_size:
+            return
+        self.cache[key] = frame
+        self.cached_bytes += len(frame)
+        while self.cached_bytes > self.cache_size:
+            _, evicted = self.cache.popitem(last=False)
+            self.cached_bytes -= len(evicted)
+
+    async def response(self, key, arguments):
+        """
+        Returns the response frame for the request with the given key
+        and arguments. If the process pool breaks, it is replaced and
+        the request is retried once.
+        """
+        for attempt in range(2):
+            pool = self.pool
+            try:
+                future, pool = self.submit(key, arguments)
+                result = await asyncio.shield(future)
+                break
+            except BrokenProcessPool:
+                if attempt > 0:
+                    raise
+                self.restart_pool(pool)
+
+        if isinstance(result, bytes):
+            frame = protocol.encode({'binary': True}, result)
+        else:
+            frame = protocol.encode({'result': result})
+        self.store(key, frame)
+        return frame
+
+    async def answer(self, document):
+        """
+        Returns the response frame for a request, given as its raw JSON
+        document. Responses are cached under a digest of that document,
+        so that cache hits never parse the SBox.
+        """
+        try:
+            key = hashlib.sha256(document).digest()
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                return self.cache[key]
+            request = json.loads(document.decode())
+            return await self.response(key, self.parse_request(request))
+        except Exception as error:
+            return protocol.encode({'error': f"{type(error).__name__}: {error}"})
+
+    async def handle(self, reader, writer):
+        """
+        Serves the requests of a single connection, one at a time.
+        """
+        try:
+            while True:
+                try:
+                    document, _ = await protocol.read_raw_frame(
+                        reader, self.max_frame
+                    )
+                except asyncio.IncompleteReadError:
+                    break
+                except protocol.FrameTooLarge as error:
+                    # The body is not read, so the stream cannot be resumed
+                    writer.write(protocol.encode({'error': f"FrameTooLarge: {error}"}))
+                    await writer.drain()
+                    break
+                writer.write(await self.answer(document))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        self.pool = self.new_pool()
+        server = await asyncio.start_unix_server(self.handle, self.path)
+        serving = asyncio.ensure_future(server.serve_forever())
+        asyncio.get_running_loop().add_signal_handler(
+            signal.SIGTERM, serving.cancel
+        )
+        try:
+            await serving
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description = "SUnbox analysis server",
+    )
+
+    parser.add_argument(
+        'socket',
+        help = 'Path of the Unix socket to listen on'
+    )
+
+    parser.add_argument(
+        '-workers', '-j',
+        type = int,
+        default = None,
+        help = 'Number of worker processes (defaults to the number of CPUs)'
+    )
+
+    parser.add_argument(
+        '-cache',
+        type = int,
+        default = 256,
+        help = 'Maximal size of the responses kept in cache, in MiB'
+    )
+
+    parser.add_argument(
+        '-tables',
+        type = int,
+        default = 512,
+        help = 'Maximal size of the tables kept by each worker, in MiB'
+    )
+
+    parser.add_argument(
+        '-max-frame',
+        dest = 'max_frame',
+        type = int,
+        default = 64,
+        help = 'Maximal size of a request, in MiB'
+    )
+
+    args = parser.parse_args()
+    server = Server(
+        args.socket, args.workers,
+        args.cache * MEGABYTE, args.tables * MEGABYTE,
+        args.max_frame * MEGABYTE
+    )
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,115 @@
+import json
+import os
+from collections import Counter
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from sunbox.sbox import SBox
+from sunbox.outofcore import OutOfCore, CheckpointMismatch, StorageTooLarge
+
+SBOXES = {
+    'toy': SBox.from_file('examples/toy'),
+    'test': SBox.from_file('examples/test'),
+    # 4 bits to 3 bits, and 3 bits to 5 bits
+    'narrow': SBox(5, 1, 7, 0, 2, 3, 3, 6, 1, 0, 4, 4, 7, 2, 2, 5),
+    'wide': SBox(17, 3, 30, 8, 0, 21, 9, 12),
+}
+
+def in_core(S, table):
+    if table == 'ddt':
+        return np.array(S.difference_distribution_table())
+    if table == 'act':
+        return np.array(S.autocorrelation_table())
+    return np.array(S.linear_approximation_table())
+
+@pytest.mark.parametrize('name', SBOXES)
+@pytest.mark.parametrize('table', ['ddt', 'act', 'lat'])
+@pytest.mark.parametrize('block_size', [1, 3, None])
+def test_matches_in_core(tmp_path, name, table, block_size):
+    S = SBOXES[name]
+    computation = OutOfCore(
+        S, table, tmp_path, block_size=block_size, workers=2, top=4
+    )
+    summary = computation.run()
+
+    expected = in_core(S, table)
+    stored = np.memmap(computation.table_path, dtype=np.int32, mode='r',
+                       shape=expected.shape)
+    assert (stored == expected).all()
+
+    values = np.abs(expected[1:] if table == 'ddt' else expected[1:, 1:])
+    assert summary.maximum == values.max()
+    assert summary.histogram == dict(sorted(Counter(values.ravel().tolist()).items()))
+
+    top = sorted(
+        (-int(values[a, b]), a + 1, b + (table != 'ddt'))
+        for a, b in np.ndindex(values.shape)
+    )[:4]
+    assert [(a, b) for a, b, _ in summary.top] == [(a, b) for _, a, b in top]
+    for a, b, value in summary.top:
+        assert expected[a][b] == value
+
+def test_probabilities():
+    S = SBox.from_file('examples/aes')
+    ddt = OutOfCore(S, 'ddt', workers=2).run()
+    lat = OutOfCore(S, 'lat', workers=2).run()
+    assert ddt.probability == S.maximal_differential_bias()[0]
+    assert lat.probability == S.maximal_linear_bias()[0]
+
+def test_resume(tmp_path):
+    S = SBox.from_file('examples/aes')
+
+    def interrupt(done, total):
+        if done == 10:
+            raise KeyboardInterrupt
+
+    computation = OutOfCore(S, 'lat', tmp_path, block_size=4, workers=2,
+                            checkpoint_interval=0)
+    with pytest.raises(KeyboardInterrupt):
+        computation.run(interrupt)
+
+    with open(computation.checkpoint_path) as file:
+        checkpoint = json.load(file)
+    assert checkpoint['completed'] + len(checkpoint['done']) >= 10
+
+    resumed = OutOfCore(S, 'lat', tmp_path, block_size=4, workers=2).run()
+    assert resumed == OutOfCore(S, 'lat', block_size=4, workers=2).run()
+
+    expected = in_core(S, 'lat')
+    stored = np.memmap(computation.table_path, dtype=np.int32, mode='r',
+                       shape=expected.shape)
+    assert (stored == expected).all()
+
+def test_interrupted_merge(tmp_path, monkeypatch):
+    S = SBox.from_file('examples/aes')
+    mark_done = OutOfCore.mark_done
+
+    def interrupt(self, i):
+        # Interrupt after the aggregates of a block have been merged,
+        # but before it is marked as done
+        if self.ndone == 10:
+            raise KeyboardInterrupt
+        mark_done(self, i)
+
+    monkeypatch.setattr(OutOfCore, 'mark_done', interrupt)
+    with pytest.raises(KeyboardInterrupt):
+        OutOfCore(S, 'ddt', tmp_path, block_size=4, workers=2).run()
+    monkeypatch.setattr(OutOfCore, 'mark_done', mark_done)
+
+    resumed = OutOfCore(S, 'ddt', tmp_path, block_size=4, workers=2).run()
+    assert resumed == OutOfCore(S, 'ddt', block_size=4, workers=2).run()
+
+def test_mismatched_checkpoint(tmp_path):
+    OutOfCore(SBOXES['toy'], 'ddt', tmp_path, workers=1).run()
+    with pytest.raises(CheckpointMismatch):
+        OutOfCore(SBOXES['toy'], 'ddt', tmp_path, store=False, workers=1).run()
+
+def test_storage_too_large(tmp_path, monkeypatch):
+    full = SimpleNamespace(f_bavail=0, f_frsize=4096)
+    monkeypatch.setattr(os, 'statvfs', lambda path: full)
+    computation = OutOfCore(SBOXES['toy'], 'ddt', tmp_path, workers=1)
+    with pytest.raises(StorageTooLarge):
+        computation.run()
+    assert not os.path.exists(computation.table_path)
@@ -0,0 +1,33 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+EXAMPLES = sorted(os.listdir('examples'))
+
+# Outputs of main.py before the tables and analyses were vectorized
+with open(os.path.join(DATA, 'tables.json')) as file:
+    TABLES = json.load(file)
+
+def main(*args):
+    return subprocess.run(
+        [sys.executable, 'main.py', *args],
+        capture_output=True, check=True,
+    ).stdout
+
+@pytest.mark.parametrize('name', EXAMPLES)
+def test_auto(name):
+    with open(os.path.join(DATA, 'auto', f'{name}.txt'), 'rb') as file:
+        expected = file.read()
+    assert main('-in', f'examples/{name}', '-auto') == expected
+
+@pytest.mark.parametrize('format', ['csv', 'ansi'])
+@pytest.mark.parametrize('name', EXAMPLES)
+def test_tables(name, format):
+    output = main('-in', f'examples/{name}', '-lat', '-ddt', '-act',
+                  '-format', format)
+    assert hashlib.sha256(output).hexdigest() == TABLES[f'{name}.{format}']
@@ -0,0 +1,62 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+
+from sunbox import protocol
+from sunbox.client import Client
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / 'sunbox.sock')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'sunbox.server', path,
+         '-workers', '2', '-max-frame', '1'],
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(path):
+        assert process.poll() is None and time.monotonic() < deadline
+        time.sleep(0.05)
+    yield path
+    process.terminate()
+    process.wait(timeout=10)
+
+def test_encode_decode():
+    frame = protocol.encode({'result': [1, 2]}, b'\x00\x01')
+    lengths = protocol.decode_header(frame[:protocol.HEADER.size])
+    body = frame[protocol.HEADER.size:]
+    assert protocol.decode_body(body, lengths[0]) == ({'result': [1, 2]}, b'\x00\x01')
+
+@pytest.mark.parametrize('sbox_file', ['examples/toy', 'examples/aes'])
+def test_client_matches_main(server, sbox_file):
+    options = ['-in', sbox_file, '-auto', '-lat', '-ddt', '-act', '-format', 'csv']
+    expected = subprocess.run(
+        [sys.executable, 'main.py', *options],
+        capture_output=True, check=True,
+    )
+    for _ in range(2):
+        output = subprocess.run(
+            [sys.executable, '-m', 'sunbox.client', server, *options],
+            capture_output=True, check=True,
+        )
+        assert output.stdout == expected.stdout
+
+def test_errors(server):
+    with Client(server) as client:
+        with pytest.raises(RuntimeError, match='Unknown command'):
+            client.request('unknown', sbox=[1, 0])
+        assert client.request('is_xor', sbox=[1, 0, 3, 2]) is True
+        with pytest.raises(RuntimeError, match='ValueError'):
+            client.request('is_xor', text='not an sbox')
+        assert client.request('is_xor', text='1, 0, 3, 2') is True
+        assert client.request('is_xor', text='1, 0, 3, 2') is True
+
+def test_frame_too_large(server):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(server)
+        sock.sendall(protocol.HEADER.pack(1 << 30, 0))
+        response, _ = protocol.receive_frame(sock)
+    assert response['error'].startswith('FrameTooLarge')